@@ -60,3 +60,59 @@ SHEET_CONFIG = {
     "date_format": "%d/%m", # Format for dates in sheet (20/08)
     "time_format": "%H:%M"  # Format for times in sheet (09:00)
 }
+
+# Write-ahead journal for confirmed bookings (flushed to Google Sheets in the background)
+JOURNAL_CONFIG = {
+    "path": "data/bookings.journal",  # Overridable with BOOKING_JOURNAL_PATH
+    "flush_interval_seconds": 2,      # How often the flusher checks for new entries
+    "batch_size": 20,                 # Max bookings written per Sheets batch update
+    "max_retry_delay_seconds": 60     # Backoff cap while Google Sheets is failing
+}
+
+# Cached copy of the worksheet (seconds before get_all_values is called again)
+SHEET_CACHE_CONFIG = {
+    "ttl_seconds": 30,             # Availability lookups
+    "export_max_age_seconds": 300  # Calendar/CSV exports, polled by calendar clients
+}
+
+# Graceful shutdown and warm restart
+SHUTDOWN_CONFIG = {
+    "state_dir": "data",         # Where snapshots are written (overridable with STATE_DIR)
+    "drain_timeout_seconds": 10  # Max wait for in-flight requests and the final journal flush
+}
+
+# Google Sheets reads: deadline, circuit breaker and stale fallback
+SHEETS_RESILIENCE_CONFIG = {
+    "read_timeout_seconds": 5,    # Deadline for a single get_all_values call
+    "failure_threshold": 3,       # Consecutive failures/timeouts before the breaker opens
+    "reset_timeout_seconds": 30,  # How long the breaker stays open before a probe read
+    "max_stale_seconds": 6 * 3600 # Oldest snapshot still served while Sheets is down
+}
+
+# Defaults for the in-process Google Sheets emulator (SHEETS_BACKEND=emulator)
+EMULATOR_CONFIG = {
+    "latency_ms": 0,        # Added to every call (EMULATOR_LATENCY_MS)
+    "jitter_ms": 0,         # +/- random variation (EMULATOR_JITTER_MS)
+    "error_rate": 0.0,      # Fraction of calls that fail (EMULATOR_ERROR_RATE)
+    "quota_per_minute": 0   # Calls per minute before 429s, 0 = unlimited (EMULATOR_QUOTA_PER_MINUTE)
+}
+
+# Live sheet rotation: past date columns are archived, upcoming ones added ahead of time
+# Past date columns move to an archive worksheet in the same spreadsheet
+ARCHIVE_CONFIG = {
+    "worksheet": "Archive",        # Created on first use
+    "days_ahead": 14,              # Date columns kept ready from today; headers further out read as last year's
+    "interval_seconds": 6 * 3600   # How often the maintenance job runs
+}
+
+# Duplicate book-appointment submissions (double-clicks, retries) return the original booking
+IDEMPOTENCY_CONFIG = {
+    "window_seconds": 10 * 60,  # How long a submission is remembered
+    "max_entries": 1000         # Upper bound on remembered submissions
+}
+
+# Availability embedded in the home page from the scheduler's cache (no extra Sheets calls)
+HOME_PRELOAD_CONFIG = {
+    "days": 3,  # Next working days to include
+    "service_combinations": [["haircut"], ["beard_trim"], ["haircut", "beard_trim"]]
+}
@@ -1,7 +1,9 @@
-from fastapi import FastAPI, Request, Form, HTTPException, Depends
+from fastapi import FastAPI, Request, Form, HTTPException, Depends, Header
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from email.utils import format_datetime, parsedate_to_datetime
+import hashlib
 import os
 from dotenv import load_dotenv
 import uvicorn
@@ -10,41 +12,119 @@ import secrets
 import string
 from typing import Optional, List, Dict
 import json
-import signal
 import sys
+import asyncio
+from contextlib import asynccontextmanager
 
-from services.scheduler import SchedulerService
+from services.scheduler import SchedulerService, SheetsUnavailableError
 from services.email_service import EmailService
-from constants import SERVICES, SHOP_INFO
+from services.schedule_export import iter_ics, iter_csv
+from services.state_store import write_json_atomic, read_json
+from services.ttl_cache import TTLCache
+from constants import (SERVICES, SHOP_INFO, MAX_BOOKING_DAYS, WORKING_DAYS, SHEET_CACHE_CONFIG, SHUTDOWN_CONFIG,
+                       IDEMPOTENCY_CONFIG, HOME_PRELOAD_CONFIG)
 from languages import TEXTS
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="Elite Barbershop", description="Professional barbershop scheduling system")
-
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
-
-# Templates
-templates = Jinja2Templates(directory="templates")
-
 # Services
 scheduler_service = SchedulerService()
 email_service = EmailService()
 
+async def notify_dead_letters(entries: List[Dict], reason: str):
+    """Tell the owner about confirmed bookings that could not be written to the sheet"""
+    lines = [f"- {entry['customer_name']} ({entry['customer_phone']}): {entry['date']} at {entry['time']}, "
+             f"{entry['duration']} min" for entry in entries]
+    await email_service.send_owner_alert(
+        f"{len(entries)} confirmed booking(s) not added to the schedule",
+        f"These bookings were confirmed to the customer but could not be written to the sheet "
+        f"({reason}). Please contact them to rearrange:\n\n" + "\n".join(lines)
+    )
+
+scheduler_service.on_dead_letter = notify_dead_letters
+
 # In-memory storage for pending confirmations (in production, use Redis or database)
 pending_confirmations = {}
 
-# Signal handler for graceful shutdown
-def signal_handler(sig, frame):
-    """Handle Ctrl+C gracefully"""
+# Recent book-appointment submissions -> booking_id, so retries don't send a second email
+recent_bookings = TTLCache(IDEMPOTENCY_CONFIG["max_entries"], IDEMPOTENCY_CONFIG["window_seconds"])
+duplicate_bookings_suppressed = 0
+
+# Snapshots written on shutdown and reloaded on startup
+STATE_DIR = os.getenv("STATE_DIR", SHUTDOWN_CONFIG["state_dir"])
+PENDING_SNAPSHOT_PATH = os.path.join(STATE_DIR, "pending_confirmations.json")
+SHEET_CACHE_SNAPSHOT_PATH = os.path.join(STATE_DIR, "sheet_cache.json")
+
+def save_pending_confirmations():
+    """Write pending confirmations to disk so customers' codes survive a restart"""
+    write_json_atomic(PENDING_SNAPSHOT_PATH, {
+        booking_id: {**booking, "created_at": booking["created_at"].isoformat()}
+        for booking_id, booking in pending_confirmations.items()
+    })
+
+def load_pending_confirmations():
+    """Restore pending confirmations from the last shutdown, dropping expired ones"""
+    snapshot = read_json(PENDING_SNAPSHOT_PATH, {})
+    cutoff = datetime.now() - timedelta(minutes=30)
+    for booking_id, booking in snapshot.items():
+        booking["created_at"] = datetime.fromisoformat(booking["created_at"])
+        if booking["created_at"] > cutoff:
+            pending_confirmations[booking_id] = booking
+    # The snapshot is only valid once: after a crash it would bring back codes that were already used
+    try:
+        os.remove(PENDING_SNAPSHOT_PATH)
+    except FileNotFoundError:
+        pass
+    if pending_confirmations:
+        print(f"Restored {len(pending_confirmations)} pending confirmation(s)")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Restore state on startup; drain background work and snapshot state on shutdown"""
+    load_pending_confirmations()
+    scheduler_service.load_cache_snapshot(SHEET_CACHE_SNAPSHOT_PATH)
+    warmer = asyncio.create_task(scheduler_service.warm_cache())
+    stop = asyncio.Event()
+    writers = {
+        asyncio.create_task(scheduler_service.run_journal_flusher(stop)),
+        asyncio.create_task(scheduler_service.run_sheet_maintenance(stop))
+    }
+    
+    yield
+    
+    # uvicorn has stopped accepting connections and drained active requests by now
     print("\n🔄 Shutting down gracefully...")
+    warmer.cancel()
+    
+    # Let the sheet writers finish what they are doing rather than cancelling them mid-write:
+    # a cancelled task releases the write lock while its worker thread keeps changing the sheet
+    stop.set()
+    _, still_running = await asyncio.wait(writers, timeout=SHUTDOWN_CONFIG["drain_timeout_seconds"])
+    
+    if still_running:
+        print("Sheet writers did not stop in time; unflushed bookings will be replayed on startup")
+    else:
+        # Last attempt to get confirmed bookings into the sheet; anything left is replayed on startup
+        try:
+            await asyncio.wait_for(scheduler_service.flush_journal(), SHUTDOWN_CONFIG["drain_timeout_seconds"])
+        except Exception as e:
+            print(f"Error flushing booking journal on shutdown: {e!r}")
+    
+    try:
+        save_pending_confirmations()
+        scheduler_service.save_cache_snapshot(SHEET_CACHE_SNAPSHOT_PATH)
+    except Exception as e:
+        print(f"Error saving state snapshot: {e}")
     print("✅ Barbershop website stopped.")
-    sys.exit(0)
 
-# Register signal handler
-signal.signal(signal.SIGINT, signal_handler)
+app = FastAPI(title="Elite Barbershop", description="Professional barbershop scheduling system", lifespan=lifespan)
+
+# Mount static files
+app.mount("/static", StaticFiles(directory="static"), name="static")
+
+# Templates
+templates = Jinja2Templates(directory="templates")
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request, lang: str = "en"):
@@ -54,9 +134,38 @@ async def home(request: Request, lang: str = "en"):
         "lang": lang,
         "texts": TEXTS[lang],
         "services": SERVICES,
-        "shop_info": SHOP_INFO
+        "shop_info": SHOP_INFO,
+        "booking_config": {
+            "workingDays": sorted((day + 1) % 7 for day in WORKING_DAYS),
+            "maxBookingDays": MAX_BOOKING_DAYS,
+            **await _initial_slots()
+        }
     })
 
+async def _initial_slots() -> Dict:
+    """Availability for the next working days and common service combinations, from the cache only.
+    
+    ``initialSlots`` is keyed like the booking form's slot cache ("YYYY-MM-DD|service,service");
+    combinations that aren't cached are left out and fetched from the API as usual.
+    ``initialSlotsAgeSeconds`` is how old the cached sheet was, so the form expires them on time.
+    """
+    initial = {}
+    age = 0.0
+    day = datetime.now().date()
+    days_found = 0
+    while days_found < HOME_PRELOAD_CONFIG["days"] and day <= datetime.now().date() + timedelta(days=MAX_BOOKING_DAYS):
+        if day.weekday() in WORKING_DAYS:
+            days_found += 1
+            for combination in HOME_PRELOAD_CONFIG["service_combinations"]:
+                services = sorted(combination)
+                duration = sum(SERVICES[service]["duration"] for service in services)
+                availability = await scheduler_service.get_availability(day.isoformat(), duration, cached_only=True)
+                if availability is not None:
+                    initial[f"{day.isoformat()}|{','.join(services)}"] = availability["slots"]
+                    age = max(age, availability.get("age_seconds") or 0.0)
+        day += timedelta(days=1)
+    return {"initialSlots": initial, "initialSlotsAgeSeconds": round(age, 1)}
+
 @app.get("/products", response_class=HTMLResponse) 
 async def products(request: Request, lang: str = "en"):
     """Products page"""
@@ -77,8 +186,20 @@ async def contact(request: Request, lang: str = "en"):
         "shop_info": SHOP_INFO
     })
 
+def _make_etag(payload) -> str:
+    """Strong ETag for a JSON-serializable payload"""
+    fingerprint = json.dumps(payload, sort_keys=True, default=str)
+    return '"' + hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:32] + '"'
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+
 @app.get("/api/available-slots")
-async def get_available_slots(date: str, services: str):
+async def get_available_slots(request: Request, date: str, services: str):
     """Get available time slots for a specific date and services"""
     try:
         # Parse services
@@ -86,11 +207,20 @@ async def get_available_slots(date: str, services: str):
         total_duration = sum(SERVICES[service]["duration"] for service in selected_services)
         
         # Get available slots from scheduler
-        slots = await scheduler_service.get_available_slots(date, total_duration)
-        
-        return {"slots": slots}
+        body = await scheduler_service.get_availability(date, total_duration)
+    except SheetsUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    
+    headers = {
+        "ETag": _make_etag(body),
+        # Short lived: slots are served from the sheet cache and change as people book
+        "Cache-Control": f"private, max-age={SHEET_CACHE_CONFIG['ttl_seconds']}"
+    }
+    if _etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(body, headers=headers)
 
 @app.post("/api/book-appointment")
 async def book_appointment(
@@ -100,14 +230,26 @@ async def book_appointment(
     date: str = Form(...),
     time: str = Form(...),
     services: str = Form(...),
-    lang: str = Form(default="en")
+    lang: str = Form(default="en"),
+    idempotency_key: Optional[str] = Header(default=None)
 ):
     """Book an appointment"""
+    global duplicate_bookings_suppressed
     try:
         # Parse services
         selected_services = services.split(",")
         total_duration = sum(SERVICES[service]["duration"] for service in selected_services)
         
+        # Same key, or the same booking details, within the window is a retry of an earlier submission
+        dedupe_keys = [("details", customer_email.strip().lower(), date, time, tuple(sorted(selected_services)))]
+        if idempotency_key:
+            dedupe_keys.insert(0, ("key", idempotency_key))
+        for key in dedupe_keys:
+            booking_id = recent_bookings.get(key)
+            if booking_id and booking_id in pending_confirmations:
+                duplicate_bookings_suppressed += 1
+                return {"success": True, "booking_id": booking_id, "message": "Confirmation email sent"}
+        
         # Generate confirmation code
         confirmation_code = ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(6))
         
@@ -125,12 +267,21 @@ async def book_appointment(
             "created_at": datetime.now(),
             "lang": lang
         }
+        # Registered before the email goes out so a concurrent double-click sees it
+        for key in dedupe_keys:
+            recent_bookings.set(key, booking_id)
         
-        # Send confirmation email
-        await email_service.send_confirmation_email(
-            customer_email, customer_name, date, time, 
-            selected_services, confirmation_code, lang
-        )
+        try:
+            # Send confirmation email
+            await email_service.send_confirmation_email(
+                customer_email, customer_name, date, time, 
+                selected_services, confirmation_code, lang
+            )
+        except Exception:
+            for key in dedupe_keys:
+                recent_bookings.pop(key)
+            pending_confirmations.pop(booking_id, None)
+            raise
         
         return {"success": True, "booking_id": booking_id, "message": "Confirmation email sent"}
         
@@ -158,7 +309,7 @@ async def confirm_appointment(
             del pending_confirmations[booking_id]
             raise HTTPException(status_code=400, detail="Confirmation code expired")
             
-        # Book the appointment in Google Sheets
+        # Reserve the appointment in the journal; it is written to Google Sheets in the background
         await scheduler_service.book_appointment(
             booking["date"], booking["time"], booking["duration"],
             booking["customer_name"], booking["customer_phone"]
@@ -172,6 +323,68 @@ async def confirm_appointment(
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.get("/api/status")
+async def status():
+    """Health of the scheduling backend: circuit breaker state, stale serves, journal backlog"""
+    return {
+        **scheduler_service.get_status(),
+        "duplicate_bookings_suppressed": duplicate_bookings_suppressed,
+        "recent_bookings_tracked": len(recent_bookings)
+    }
+
+async def _schedule_export(request: Request, token: str, start: Optional[str], end: Optional[str],
+                           media_type: str, render):
+    """Shared handler for schedule exports with ETag / If-Modified-Since support"""
+    export_token = os.getenv("SCHEDULE_EXPORT_TOKEN")
+    if not export_token or not secrets.compare_digest(token, export_token):
+        raise HTTPException(status_code=403, detail="Invalid export token")
+    
+    try:
+        today = datetime.now().date()
+        start_date = datetime.strptime(start, "%Y-%m-%d").date() if start else today
+        end_date = datetime.strptime(end, "%Y-%m-%d").date() if end else today + timedelta(days=MAX_BOOKING_DAYS)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+    
+    try:
+        bookings = await scheduler_service.get_schedule(start_date, end_date)
+    except SheetsUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    modified_at = scheduler_service.schedule_modified_at().astimezone().replace(microsecond=0)
+    
+    etag = _make_etag([media_type, start_date.isoformat(), end_date.isoformat(), bookings])
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(modified_at, usegmt=True),
+        "Cache-Control": "private, no-cache"
+    }
+    
+    # If-None-Match wins over If-Modified-Since when both are sent
+    if request.headers.get("if-none-match"):
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+    elif request.headers.get("if-modified-since"):
+        try:
+            if modified_at <= parsedate_to_datetime(request.headers["if-modified-since"]):
+                return Response(status_code=304, headers=headers)
+        except (TypeError, ValueError):
+            pass
+    
+    return StreamingResponse(render(bookings), media_type=media_type, headers=headers)
+
+@app.get("/calendar.ics")
+async def calendar_feed(request: Request, token: str, start: Optional[str] = None, end: Optional[str] = None):
+    """Bookings as an iCalendar feed for the owner's phone calendar"""
+    return await _schedule_export(
+        request, token, start, end, "text/calendar; charset=utf-8",
+        lambda bookings: iter_ics(bookings, datetime.now())
+    )
+
+@app.get("/schedule.csv")
+async def schedule_csv(request: Request, token: str, start: Optional[str] = None, end: Optional[str] = None):
+    """Bookings as a CSV download"""
+    return await _schedule_export(request, token, start, end, "text/csv; charset=utf-8", iter_csv)
+
 @app.get("/confirm", response_class=HTMLResponse)
 async def confirm_page(request: Request, booking_id: str, lang: str = "en"):
     """Confirmation page"""
@@ -193,9 +406,10 @@ if __name__ == "__main__":
         
         # Use PORT environment variable for Render deployment
         port = int(os.getenv("PORT", 8000))
-        uvicorn.run("main:app", host="0.0.0.0", port=port, reload=False)
+        # uvicorn handles SIGINT/SIGTERM: stops accepting, drains requests, then runs the lifespan shutdown
+        uvicorn.run("main:app", host="0.0.0.0", port=port, reload=False,
+                    timeout_graceful_shutdown=SHUTDOWN_CONFIG["drain_timeout_seconds"])
     except KeyboardInterrupt:
-        print("\n🔄 Shutting down gracefully...")
         print("✅ Barbershop website stopped.")
     except Exception as e:
         print(f"\n❌ Error starting server: {e}")
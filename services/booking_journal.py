@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+
+class BookingJournal:
+    """Append-only, fsync'd journal of confirmed bookings not yet written to the sheet.
+
+    Each line is a JSON record: ``{"op": "book", ...}`` when a booking is
+    confirmed and ``{"op": "flushed", "id": ...}`` once it reached Google Sheets.
+    Entries that can never be written are moved to ``<path>.dead`` and recorded
+    as ``{"op": "dead", "id": ...}``.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict] = {}
+        self.modified_at = datetime.now()
+        self.dead_count = 0  # Lines in the dead-letter file, across restarts
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._replay()
+        if os.path.exists(path + ".dead"):
+            with open(path + ".dead", "r", encoding="utf-8") as f:
+                self.dead_count = sum(1 for line in f if line.strip())
+
+    def _replay(self):
+        """Load unflushed entries left over from a previous run"""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write; everything before it is intact
+                    print(f"Skipping corrupt journal line: {line[:80]}")
+                    continue
+
+                if record.get("op") == "book":
+                    self._pending[record["id"]] = record
+                elif record.get("op") in ("flushed", "dead"):
+                    self._pending.pop(record["id"], None)
+
+        # Rewrite the file with only what is still pending
+        self._compact()
+        if self._pending:
+            print(f"Replayed {len(self._pending)} unflushed booking(s) from journal")
+
+    def _write(self, records: List[Dict]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _compact(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in self._pending.values():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _overlaps(self, date_str: str, time_str: str, duration_minutes: int) -> bool:
+        start = datetime.strptime(time_str, "%H:%M")
+        end = start + timedelta(minutes=duration_minutes)
+        for entry in self._pending.values():
+            if entry["date"] != date_str:
+                continue
+            booked_start = datetime.strptime(entry["time"], "%H:%M")
+            booked_end = booked_start + timedelta(minutes=entry["duration"])
+            if start < booked_end and booked_start < end:
+                return True
+        return False
+
+    def overlaps(self, date_str: str, time_str: str, duration_minutes: int) -> bool:
+        """Whether a slot overlaps an unflushed entry"""
+        with self._lock:
+            return self._overlaps(date_str, time_str, duration_minutes)
+
+    def append_if_free(self, date_str: str, time_str: str, duration_minutes: int,
+                       customer_name: str, customer_phone: str,
+                       is_taken: Optional[Callable[[], bool]] = None) -> Optional[Dict]:
+        """Durably record a confirmed booking unless the slot is already taken.
+
+        The overlap check, the optional ``is_taken`` check and the append happen
+        under one lock, so two confirmations for the same slot can't both pass.
+        Returns the journal entry, or None if the slot was taken.
+        """
+        entry = {
+            "op": "book",
+            "id": uuid.uuid4().hex,
+            "date": date_str,
+            "time": time_str,
+            "duration": duration_minutes,
+            "customer_name": customer_name,
+            "customer_phone": customer_phone,
+            "created_at": datetime.now().isoformat(),
+        }
+        with self._lock:
+            if self._overlaps(date_str, time_str, duration_minutes) or (is_taken and is_taken()):
+                return None
+            self._write([entry])
+            self._pending[entry["id"]] = entry
+            self.modified_at = datetime.now()
+        return entry
+
+    def _remove(self, entry_ids: List[str], op: str):
+        ids = [entry_id for entry_id in entry_ids if entry_id in self._pending]
+        if not ids:
+            return
+        for entry_id in ids:
+            del self._pending[entry_id]
+        self.modified_at = datetime.now()
+        if self._pending:
+            self._write([{"op": op, "id": entry_id} for entry_id in ids])
+        else:
+            # Nothing left to replay, so start the file over instead of growing it
+            self._compact()
+
+    def mark_flushed(self, entry_ids: List[str]):
+        """Record that entries were written to the sheet"""
+        with self._lock:
+            self._remove(entry_ids, "flushed")
+
+    def dead_letter(self, entries: List[Dict], reason: str):
+        """Move entries that can never be written to the sheet into the dead-letter file"""
+        if not entries:
+            return
+        with self._lock:
+            with open(self.path + ".dead", "a", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps({**entry, "reason": reason, "dead_at": datetime.now().isoformat()},
+                                       ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._remove([entry["id"] for entry in entries], "dead")
+            self.dead_count += len(entries)
+        for entry in entries:
+            print(f"Booking {entry['id']} ({entry['customer_name']} on {entry['date']} at {entry['time']}) "
+                  f"moved to the dead-letter file: {reason}")
+
+    def pending(self) -> List[Dict]:
+        """All unflushed entries, oldest first"""
+        with self._lock:
+            return list(self._pending.values())
@@ -0,0 +1,68 @@
+import time
+from typing import Dict
+
+
+class CircuitBreaker:
+    """Stop calling a failing dependency for a while instead of waiting on it every request.
+
+    Closed: calls go through. After ``failure_threshold`` consecutive failures it
+    opens and calls are refused. Once ``reset_timeout_seconds`` have passed one
+    probe call is let through (half-open); success closes it, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.last_failure_at = float("-inf")
+        self.times_opened = 0
+        self.total_failures = 0
+        self.rejected_calls = 0
+
+    def allow_request(self) -> bool:
+        """Whether a call may be made now; in half-open state only the single probe is allowed"""
+        if self.state == self.CLOSED:
+            return True
+
+        # A probe that never reported back (e.g. cancelled) doesn't block the next one forever
+        if time.monotonic() - self.opened_at >= self.reset_timeout_seconds:
+            self.state = self.HALF_OPEN
+            self.opened_at = time.monotonic()
+            return True
+
+        self.rejected_calls += 1
+        return False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            print(f"Circuit breaker '{self.name}' closed")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self.total_failures += 1
+        self.last_failure_at = time.monotonic()
+
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                print(f"Circuit breaker '{self.name}' opened after {self.consecutive_failures} failure(s)")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "total_failures": self.total_failures,
+            "times_opened": self.times_opened,
+            "rejected_calls": self.rejected_calls
+        }
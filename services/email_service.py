@@ -66,6 +66,32 @@ class EmailService:
             print(f"Mock email to {customer_email}: Confirmation code {confirmation_code}")
             return True  # Don't fail the booking if email fails
     
+    async def send_owner_alert(self, subject: str, body: str):
+        """Send a plain-text alert to the shop's contact address"""
+        owner_email = SHOP_INFO["contact"]["email"]
+        try:
+            if not self.email or not self.password:
+                print(f"Mock email to {owner_email}: {subject}\n{body}")
+                return True
+            
+            msg = MIMEText(body, 'plain')
+            msg['From'] = self.email
+            msg['To'] = owner_email
+            msg['Subject'] = subject
+            
+            server = smtplib.SMTP('smtp.gmail.com', 587)
+            server.starttls()
+            server.login(self.email, self.password)
+            server.send_message(msg)
+            server.quit()
+            
+            return True
+            
+        except Exception as e:
+            print(f"Error sending email: {e}")
+            print(f"Mock email to {owner_email}: {subject}\n{body}")
+            return False
+    
     def _get_english_email_body(self, customer_name: str, date: str, time: str, 
                                services: List[str], confirmation_code: str) -> str:
         """Generate English email body"""
@@ -0,0 +1,62 @@
+import csv
+import hashlib
+import io
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List
+from constants import SHOP_INFO
+
+
+def _escape_ics(text: str) -> str:
+    """Escape a value for an iCalendar TEXT property"""
+    return (text.replace("\\", "\\\\").replace(";", "\\;")
+                .replace(",", "\\,").replace("\n", "\\n"))
+
+
+def iter_ics(bookings: List[Dict], generated_at: datetime) -> Iterator[str]:
+    """Yield an iCalendar feed one event at a time"""
+    yield "BEGIN:VCALENDAR\r\n"
+    yield "VERSION:2.0\r\n"
+    yield f"PRODID:-//{_escape_ics(SHOP_INFO['name_en'])}//Schedule//EN\r\n"
+    yield f"X-WR-CALNAME:{_escape_ics(SHOP_INFO['name_en'])}\r\n"
+
+    # DTSTAMP must be UTC (RFC 5545)
+    stamp = generated_at.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    for booking in bookings:
+        day = booking["date"].strftime("%Y%m%d")
+        start = booking["start"].replace(":", "")
+        end = booking["end"].replace(":", "")
+        summary = booking["details"]
+        if booking["status"] != "confirmed":
+            summary += " [syncing]"
+
+        # Stable per booking, and distinct even if two bookings share a slot
+        details_hash = hashlib.sha256(booking["details"].encode("utf-8")).hexdigest()[:12]
+
+        # Times are floating (no TZID) so clients show them in the shop's local time
+        yield "BEGIN:VEVENT\r\n"
+        yield f"UID:{day}T{start}-{end}-{details_hash}@{SHOP_INFO['contact']['email'].split('@')[-1]}\r\n"
+        yield f"DTSTAMP:{stamp}\r\n"
+        yield f"DTSTART:{day}T{start}00\r\n"
+        yield f"DTEND:{day}T{end}00\r\n"
+        yield f"SUMMARY:{_escape_ics(summary)}\r\n"
+        yield "END:VEVENT\r\n"
+
+    yield "END:VCALENDAR\r\n"
+
+
+def iter_csv(bookings: List[Dict]) -> Iterator[str]:
+    """Yield the schedule as CSV rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(["date", "start", "end", "details", "status"])
+    for booking in bookings:
+        writer.writerow([booking["date"].isoformat(), booking["start"], booking["end"],
+                         booking["details"], booking["status"]])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    # Header only, when there are no bookings
+    if buffer.getvalue():
+        yield buffer.getvalue()
@@ -1,55 +1,106 @@
 import gspread
+from gspread.utils import rowcol_to_a1
 from google.oauth2.service_account import Credentials
 import os
+import asyncio
+import hashlib
+import time
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import json
-from constants import TIME_SLOT_INTERVAL, WORKING_DAYS, MAX_BOOKING_DAYS, SHOP_INFO, SHEET_CONFIG
+from constants import (TIME_SLOT_INTERVAL, WORKING_DAYS, MAX_BOOKING_DAYS, SHOP_INFO, SHEET_CONFIG,
+                       JOURNAL_CONFIG, SHEET_CACHE_CONFIG, SHEETS_RESILIENCE_CONFIG, ARCHIVE_CONFIG)
+from services.booking_journal import BookingJournal
+from services.circuit_breaker import CircuitBreaker
+from services.sheet_emulator import EmulatedWorksheet
+from services.sheet_maintenance import rotate_schedule, column_dates
+from services.state_store import write_json_atomic, read_json
+
+class SheetsUnavailableError(Exception):
+    """Google Sheets can't be read and there is no usable cached copy"""
+
+def open_worksheet():
+    """Open the schedule worksheet configured in the environment, or None to use mock data.
+    
+    Only connects to Google Sheets (or the emulator); unlike SchedulerService it
+    never touches the booking journal, so it is safe to use next to a running server.
+    """
+    if os.getenv('SHEETS_BACKEND', '').lower() == 'emulator':
+        print("Using the in-process Google Sheets emulator.")
+        return EmulatedWorksheet.from_env()
+    
+    try:
+        # Set up credentials
+        scope = ['https://spreadsheets.google.com/feeds',
+                'https://www.googleapis.com/auth/drive']
+        
+        credentials_json = os.getenv('GOOGLE_SHEETS_CREDENTIALS_JSON')
+        if credentials_json:
+            # Try to parse as JSON string first
+            try:
+                credentials_dict = json.loads(credentials_json)
+                creds = Credentials.from_service_account_info(credentials_dict, scopes=scope)
+            except json.JSONDecodeError:
+                # If it's not JSON, treat as file path (backward compatibility)
+                if os.path.exists(credentials_json):
+                    creds = Credentials.from_service_account_file(credentials_json, scopes=scope)
+                else:
+                    raise Exception("Invalid credentials format")
+            
+            gc = gspread.authorize(creds)
+            
+            # Open the spreadsheet
+            sheet_id = os.getenv('GOOGLE_SHEET_ID')
+            if sheet_id:
+                sheet = gc.open_by_key(sheet_id).sheet1
+                print("Google Sheets connection established successfully!")
+                return sheet
+            print("Warning: GOOGLE_SHEET_ID not found in environment variables.")
+        else:
+            print("Warning: Google Sheets credentials not found. Using mock data.")
+            
+    except Exception as e:
+        print(f"Error initializing Google Sheets: {e}")
+        print("Using mock data for development.")
+    return None
 
 class SchedulerService:
     def __init__(self):
-        self.gc = None
         self.sheet = None
+        self.journal = BookingJournal(os.getenv('BOOKING_JOURNAL_PATH', JOURNAL_CONFIG["path"]))
+        self._flush_failures = {}  # journal entry id -> failed flush attempts
+        self._sheet_cache = None   # {"values", "fetched_at", "fingerprint", "invalidated"} from the last get_all_values
+        self._sheet_lock = asyncio.Lock()
+        self._refresh_task = None
+        # Held while writing to the sheet so column indexes don't shift under a batch update
+        self._write_lock = asyncio.Lock()
+        self.sheet_modified_at = datetime.now()
+        self.sheets_breaker = CircuitBreaker(
+            "google_sheets",
+            SHEETS_RESILIENCE_CONFIG["failure_threshold"],
+            SHEETS_RESILIENCE_CONFIG["reset_timeout_seconds"]
+        )
+        self.stale_serves = 0
+        # Awaited as on_dead_letter(entries, reason) for confirmed bookings that can't reach the sheet
+        self.on_dead_letter = None
         self._initialize_google_sheets()
     
     def _initialize_google_sheets(self):
         """Initialize Google Sheets connection"""
-        try:
-            # Set up credentials
-            scope = ['https://spreadsheets.google.com/feeds',
-                    'https://www.googleapis.com/auth/drive']
-            
-            credentials_json = os.getenv('GOOGLE_SHEETS_CREDENTIALS_JSON')
-            if credentials_json:
-                # Try to parse as JSON string first
-                try:
-                    credentials_dict = json.loads(credentials_json)
-                    creds = Credentials.from_service_account_info(credentials_dict, scopes=scope)
-                except json.JSONDecodeError:
-                    # If it's not JSON, treat as file path (backward compatibility)
-                    if os.path.exists(credentials_json):
-                        creds = Credentials.from_service_account_file(credentials_json, scopes=scope)
-                    else:
-                        raise Exception("Invalid credentials format")
-                
-                self.gc = gspread.authorize(creds)
-                
-                # Open the spreadsheet
-                sheet_id = os.getenv('GOOGLE_SHEET_ID')
-                if sheet_id:
-                    self.sheet = self.gc.open_by_key(sheet_id).sheet1
-                    print("Google Sheets connection established successfully!")
-                else:
-                    print("Warning: GOOGLE_SHEET_ID not found in environment variables.")
-            else:
-                print("Warning: Google Sheets credentials not found. Using mock data.")
-                
-        except Exception as e:
-            print(f"Error initializing Google Sheets: {e}")
-            print("Using mock data for development.")
+        self.sheet = open_worksheet()
     
     async def get_available_slots(self, date_str: str, duration_minutes: int) -> List[str]:
         """Get available time slots for a specific date"""
+        return (await self.get_availability(date_str, duration_minutes))["slots"]
+    
+    async def get_availability(self, date_str: str, duration_minutes: int, cached_only: bool = False) -> Optional[Dict]:
+        """Get available time slots, flagging answers served from a stale sheet snapshot.
+        
+        With cached_only the sheet is never called from the request: the answer carries the
+        cache's ``age_seconds``, and when there is no fresh cached copy None is returned and a
+        refresh is started in the background for the next caller.
+        """
+        result = {"slots": [], "stale": False}
         try:
             # Parse date
             date = datetime.strptime(date_str, "%Y-%m-%d").date()
@@ -57,35 +108,53 @@ class SchedulerService:
             # Check if date is within booking range
             today = datetime.now().date()
             if date < today or date > today + timedelta(days=MAX_BOOKING_DAYS):
-                return []
+                return result
             
             # Check if it's a working day
             if date.weekday() not in WORKING_DAYS:
-                return []
+                return result
             
-            if self.sheet:
-                return await self._get_slots_from_sheet(date, duration_minutes)
+            if self.sheet and cached_only:
+                if not self._sheet_cache_fresh(SHEET_CACHE_CONFIG["ttl_seconds"]):
+                    self._refresh_in_background()
+                    return None
+                slots = self._get_slots_from_values(self._sheet_cache["values"], date, duration_minutes)
+                result["age_seconds"] = self.sheet_cache_age()
+            elif self.sheet:
+                all_values, stale = await self._read_sheet()
+                slots = self._get_slots_from_values(all_values, date, duration_minutes)
+                if stale:
+                    result["stale"] = True
+                    result["as_of"] = (datetime.now() - timedelta(seconds=self.sheet_cache_age())).isoformat(timespec="seconds")
             else:
                 # Mock data for development
-                return self._get_mock_slots(date, duration_minutes)
-                
+                slots = self._get_mock_slots(date, duration_minutes)
+            
+            # Bookings confirmed but not yet written to the sheet still hold their slots
+            result["slots"] = [slot for slot in slots if not self._conflicts_with_journal(date_str, slot, duration_minutes)]
+            return result
+        
+        except SheetsUnavailableError:
+            raise
         except Exception as e:
             print(f"Error getting available slots: {e}")
-            return []
+            return result
     
-    async def _get_slots_from_sheet(self, date, duration_minutes: int) -> List[str]:
-        """Get available slots from Google Sheets"""
+    @staticmethod
+    def _date_columns(all_values: List[List[str]]) -> Dict:
+        """Date -> 0-based column for the sheet's date headers.
+        
+        Every lookup goes through column_dates, so availability, the flusher and
+        maintenance always agree on which column holds a day, even with repeated headers.
+        """
+        if not all_values:
+            return {}
+        return {day: col_idx for col_idx, day in column_dates(all_values[0], datetime.now().date()).items()}
+    
+    def _get_slots_from_values(self, all_values: List[List[str]], date, duration_minutes: int) -> List[str]:
+        """Get available slots from the worksheet contents"""
         try:
-            # Find the date column
-            date_str = date.strftime("%d/%m")
-            all_values = self.sheet.get_all_values()
-            
-            date_col = None
-            for col_idx, cell in enumerate(all_values[0]):
-                if cell == date_str:
-                    date_col = col_idx
-                    break
-            
+            date_col = self._date_columns(all_values).get(date)
             if date_col is None:
                 return []
             
@@ -109,7 +178,7 @@ class SchedulerService:
                         time_row = row_idx
                         break
                 
-                if time_row is None or len(all_values[time_row]) <= date_col or not all_values[time_row][date_col]:
+                if time_row is None or len(all_values[time_row-1]) <= date_col or not all_values[time_row-1][date_col]:
                     # Check if we have enough consecutive slots
                     slots_needed = duration_minutes // TIME_SLOT_INTERVAL
                     available = True
@@ -139,6 +208,208 @@ class SchedulerService:
             print(f"Error getting slots from sheet: {e}")
             return []
     
+    async def _get_sheet_values(self, max_age_seconds: Optional[float] = None) -> List[List[str]]:
+        """Return the worksheet contents, possibly from a stale snapshot"""
+        values, _ = await self._read_sheet(max_age_seconds)
+        return values
+    
+    async def _read_sheet(self, max_age_seconds: Optional[float] = None) -> Tuple[List[List[str]], bool]:
+        """Return (values, stale), reusing the cached copy while it is fresh enough.
+        
+        Reads are bounded by a deadline and guarded by a circuit breaker; when
+        Google Sheets is failing the last good snapshot is served and refreshed
+        in the background.
+        """
+        if max_age_seconds is None:
+            max_age_seconds = SHEET_CACHE_CONFIG["ttl_seconds"]
+        
+        waiting_since = time.monotonic()
+        async with self._sheet_lock:
+            cache = self._sheet_cache
+            if self._sheet_cache_fresh(max_age_seconds):
+                return cache["values"], False
+            
+            # Don't queue up behind a read that just failed, or call Sheets while the breaker is open
+            if self.sheets_breaker.last_failure_at >= waiting_since or not self.sheets_breaker.allow_request():
+                return self._serve_stale()
+            
+            try:
+                values = await asyncio.wait_for(
+                    asyncio.to_thread(self.sheet.get_all_values),
+                    SHEETS_RESILIENCE_CONFIG["read_timeout_seconds"]
+                )
+            except Exception as e:
+                self.sheets_breaker.record_failure()
+                print(f"Error reading Google Sheets: {e!r}")
+                return self._serve_stale()
+            
+            self.sheets_breaker.record_success()
+            fingerprint = hashlib.sha256(json.dumps(values).encode("utf-8")).hexdigest()
+            if not cache or cache["fingerprint"] != fingerprint:
+                self.sheet_modified_at = datetime.now()
+            self._sheet_cache = {"values": values, "fetched_at": time.monotonic(), "fingerprint": fingerprint, "invalidated": False}
+            return values, False
+    
+    def _serve_stale(self) -> Tuple[List[List[str]], bool]:
+        """Fall back to the last good snapshot and refresh it in the background"""
+        age = self.sheet_cache_age()
+        if age is None or age > SHEETS_RESILIENCE_CONFIG["max_stale_seconds"]:
+            raise SheetsUnavailableError("Google Sheets is temporarily unavailable")
+        
+        if asyncio.current_task() is self._refresh_task:
+            # The background refresh itself failed; the caller already got the stale copy
+            return self._sheet_cache["values"], True
+        
+        self.stale_serves += 1
+        self._refresh_in_background()
+        return self._sheet_cache["values"], True
+    
+    def _refresh_in_background(self):
+        """Start a sheet read in the background unless one is already running"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._read_sheet(0))
+            # Failures are already counted by the breaker
+            self._refresh_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+    
+    def _sheet_cache_fresh(self, max_age_seconds: float) -> bool:
+        """Whether the cached sheet can be used without calling Google Sheets"""
+        cache = self._sheet_cache
+        return bool(cache) and not cache["invalidated"] and time.monotonic() - cache["fetched_at"] < max_age_seconds
+    
+    def sheet_cache_age(self) -> Optional[float]:
+        """Seconds since the cached sheet was fetched, or None if nothing is cached"""
+        if not self._sheet_cache:
+            return None
+        return time.monotonic() - self._sheet_cache["fetched_at"]
+    
+    def _invalidate_sheet_cache(self):
+        """Force the next read to fetch the sheet again"""
+        if self._sheet_cache:
+            self._sheet_cache["invalidated"] = True
+    
+    def get_status(self) -> Dict:
+        """Health information about the Google Sheets backend"""
+        age = self.sheet_cache_age()
+        status = {
+            "sheets_connected": self.sheet is not None,
+            "circuit_breaker": self.sheets_breaker.stats(),
+            "stale_serves": self.stale_serves,
+            "sheet_cache_age_seconds": round(age, 1) if age is not None else None,
+            "journal_pending": len(self.journal.pending()),
+            "journal_dead_letters": self.journal.dead_count
+        }
+        if isinstance(self.sheet, EmulatedWorksheet):
+            status["emulator"] = self.sheet.stats()
+        return status
+    
+    def save_cache_snapshot(self, path: str):
+        """Persist the cached sheet so the next process starts warm"""
+        cache = self._sheet_cache
+        if not cache:
+            return
+        age = time.monotonic() - cache["fetched_at"]
+        write_json_atomic(path, {
+            "values": cache["values"],
+            "fingerprint": cache["fingerprint"],
+            "invalidated": cache["invalidated"],
+            "fetched_at": time.time() - age,
+            "modified_at": self.sheet_modified_at.isoformat()
+        })
+    
+    def load_cache_snapshot(self, path: str):
+        """Seed the sheet cache from a snapshot, keeping its real age"""
+        snapshot = read_json(path)
+        if not self.sheet or not snapshot:
+            return
+        age = max(0.0, time.time() - snapshot["fetched_at"])
+        self._sheet_cache = {
+            "values": snapshot["values"],
+            "fetched_at": time.monotonic() - age,
+            "fingerprint": snapshot["fingerprint"],
+            "invalidated": snapshot.get("invalidated", False)
+        }
+        self.sheet_modified_at = datetime.fromisoformat(snapshot["modified_at"])
+        print(f"Loaded sheet cache snapshot ({int(age)}s old)")
+    
+    async def warm_cache(self):
+        """Refresh the sheet cache ahead of the first customer request"""
+        if not self.sheet:
+            return
+        try:
+            await self._get_sheet_values()
+        except Exception as e:
+            print(f"Error warming sheet cache: {e}")
+    
+    async def get_schedule(self, start_date, end_date) -> List[Dict]:
+        """List bookings between two dates (inclusive) from the cached sheet and the journal"""
+        bookings = []
+        
+        if self.sheet:
+            all_values = await self._get_sheet_values(SHEET_CACHE_CONFIG["export_max_age_seconds"])
+            bookings.extend(self._bookings_from_values(all_values, start_date, end_date))
+        
+        for entry in self.journal.pending():
+            date = datetime.strptime(entry["date"], "%Y-%m-%d").date()
+            if start_date <= date <= end_date:
+                start = datetime.strptime(entry["time"], "%H:%M")
+                bookings.append({
+                    "date": date,
+                    "start": entry["time"],
+                    "end": (start + timedelta(minutes=entry["duration"])).strftime("%H:%M"),
+                    "details": f"{entry['customer_name']} ({entry['customer_phone']})",
+                    "status": "pending_sync"
+                })
+        
+        bookings.sort(key=lambda booking: (booking["date"], booking["start"]))
+        return bookings
+    
+    def _bookings_from_values(self, all_values: List[List[str]], start_date, end_date) -> List[Dict]:
+        """Turn booked cells into bookings, merging consecutive slots with the same text"""
+        if not all_values:
+            return []
+        
+        time_rows = []
+        for row in all_values[SHEET_CONFIG["first_time_slot_row"]-1:]:
+            if len(row) > SHEET_CONFIG["time_column"] and row[SHEET_CONFIG["time_column"]]:
+                time_rows.append(row)
+        
+        bookings = []
+        
+        for col_idx, date in sorted(column_dates(all_values[0], datetime.now().date()).items()):
+            if not start_date <= date <= end_date:
+                continue
+            
+            current = None
+            for row in time_rows:
+                details = row[col_idx].strip() if len(row) > col_idx else ""
+                slot_start = row[SHEET_CONFIG["time_column"]]
+                if current and details == current["details"] and slot_start == current["end"]:
+                    current["end"] = self._add_minutes(slot_start, TIME_SLOT_INTERVAL)
+                    continue
+                if current:
+                    bookings.append(current)
+                current = None
+                if details:
+                    current = {
+                        "date": date,
+                        "start": slot_start,
+                        "end": self._add_minutes(slot_start, TIME_SLOT_INTERVAL),
+                        "details": details,
+                        "status": "confirmed"
+                    }
+            if current:
+                bookings.append(current)
+        
+        return bookings
+    
+    @staticmethod
+    def _add_minutes(time_str: str, minutes: int) -> str:
+        return (datetime.strptime(time_str, "%H:%M") + timedelta(minutes=minutes)).strftime("%H:%M")
+    
+    def schedule_modified_at(self) -> datetime:
+        """When the data behind get_schedule last changed"""
+        return max(self.sheet_modified_at, self.journal.modified_at)
+    
     def _get_mock_slots(self, date, duration_minutes: int) -> List[str]:
         """Generate mock available slots for development"""
         available_slots = []
@@ -160,48 +431,218 @@ class SchedulerService:
         
         return available_slots
     
+    def _conflicts_with_journal(self, date_str: str, time_str: str, duration_minutes: int) -> bool:
+        """Check whether a slot overlaps a journaled booking that is not in the sheet yet"""
+        return self.journal.overlaps(date_str, time_str, duration_minutes)
+    
+    def _taken_in_cached_sheet(self, date_str: str, time_str: str, duration_minutes: int) -> bool:
+        """Check the cached sheet (at any age) for bookings in the slot's cells"""
+        cache = self._sheet_cache
+        if not self.sheet or not cache:
+            return False
+        
+        all_values = cache["values"]
+        date_col = self._date_columns(all_values).get(datetime.strptime(date_str, "%Y-%m-%d").date())
+        if date_col is None:
+            return False
+        
+        slot_times = {self._add_minutes(time_str, i * TIME_SLOT_INTERVAL) for i in range(duration_minutes // TIME_SLOT_INTERVAL)}
+        for row in all_values[SHEET_CONFIG["first_time_slot_row"]-1:]:
+            if len(row) > max(date_col, SHEET_CONFIG["time_column"]) and row[SHEET_CONFIG["time_column"]] in slot_times and row[date_col]:
+                return True
+        return False
+    
     async def book_appointment(self, date_str: str, time_str: str, duration_minutes: int, 
                              customer_name: str, customer_phone: str):
-        """Book an appointment in Google Sheets"""
-        try:
-            if not self.sheet:
-                print(f"Mock booking: {customer_name} on {date_str} at {time_str}")
-                return True
-            
-            # Find the date column
-            date = datetime.strptime(date_str, "%Y-%m-%d").date()
-            date_display = date.strftime(SHEET_CONFIG["date_format"])
-            
-            all_values = self.sheet.get_all_values()
-            date_col = None
-            
-            for col_idx, cell in enumerate(all_values[0]):
-                if cell == date_display:
-                    date_col = col_idx
-                    break
-            
+        """Reserve an appointment in the journal; the background flusher writes it to Google Sheets"""
+        if self.sheet and not self._sheet_cache_fresh(SHEET_CACHE_CONFIG["ttl_seconds"]):
+            # Never wait for Sheets here: check the copy we have and refresh it for the next booking.
+            # A slot taken since that copy was fetched is caught by the flusher, which never overwrites a filled cell.
+            self._refresh_in_background()
+        
+        # Runs in a worker thread because of the fsync
+        entry = await asyncio.to_thread(
+            self.journal.append_if_free, date_str, time_str, duration_minutes, customer_name, customer_phone,
+            lambda: self._taken_in_cached_sheet(date_str, time_str, duration_minutes)
+        )
+        if entry is None:
+            raise Exception("Time slot is no longer available")
+        return entry["id"]
+    
+    async def flush_journal(self) -> int:
+        """Write a batch of journaled bookings to Google Sheets, returns how many were flushed"""
+        # Entries that keep failing go to the back so they don't block newer bookings
+        entries = sorted(self.journal.pending(), key=lambda entry: self._flush_failures.get(entry["id"], 0))
+        entries = entries[:JOURNAL_CONFIG["batch_size"]]
+        if not entries:
+            return 0
+        
+        if not self.sheet:
+            for entry in entries:
+                print(f"Mock booking: {entry['customer_name']} on {entry['date']} at {entry['time']}")
+            self.journal.mark_flushed([entry["id"] for entry in entries])
+            return len(entries)
+        
+        async with self._write_lock:
+            flushed_ids, rejected, written_cells = await asyncio.to_thread(self._write_bookings_to_sheet, entries)
+        if written_cells:
+            # Under the read lock so a read that started before the write can't replace the patched copy
+            async with self._sheet_lock:
+                self._apply_to_sheet_cache(written_cells)
+        dead_ids = set()
+        for reason, dead in rejected.items():
+            self.journal.dead_letter(dead, reason)
+            dead_ids.update(entry["id"] for entry in dead)
+            if dead and self.on_dead_letter:
+                # The customer was already told the booking is confirmed; someone has to follow up
+                try:
+                    await self.on_dead_letter(dead, reason)
+                except Exception as e:
+                    print(f"Error reporting dead-lettered bookings: {e!r}")
+        self.journal.mark_flushed(flushed_ids)
+        for entry in entries:
+            if entry["id"] in flushed_ids or entry["id"] in dead_ids:
+                self._flush_failures.pop(entry["id"], None)
+            else:
+                self._flush_failures[entry["id"]] = self._flush_failures.get(entry["id"], 0) + 1
+        return len(flushed_ids)
+    
+    def _write_bookings_to_sheet(self, entries: List[Dict]) -> Tuple[List[str], Dict[str, List[Dict]], Dict[Tuple, str]]:
+        """Apply journal entries with one read and one batch update.
+        
+        Returns the ids written, the entries that can never be written keyed by
+        reason (filled cells are never overwritten, past days may have been
+        archived), and the written cells keyed by (date, time label).
+        """
+        all_values = self.sheet.get_all_values()
+        
+        date_columns = self._date_columns(all_values)
+        time_rows = {}
+        for row_idx, row in enumerate(all_values[SHEET_CONFIG["first_time_slot_row"]-1:], start=SHEET_CONFIG["first_time_slot_row"]):
+            if len(row) > SHEET_CONFIG["time_column"] and row[SHEET_CONFIG["time_column"]]:
+                time_rows.setdefault(row[SHEET_CONFIG["time_column"]], row_idx)
+        
+        updates = []
+        written_ids = []
+        rejected = {"slot already booked in the sheet": [], "date column no longer in the sheet": []}
+        written_cells = {}
+        claimed = set()  # (row, col) cells written by earlier entries in this batch
+        for entry in entries:
+            date = datetime.strptime(entry["date"], "%Y-%m-%d").date()
+            date_col = date_columns.get(date)
             if date_col is None:
-                raise Exception("Date column not found")
-            
-            # Find time rows and mark as booked
-            slots_needed = duration_minutes // TIME_SLOT_INTERVAL
-            current_time = datetime.strptime(time_str, "%H:%M")
-            
-            booking_info = f"{customer_name} ({customer_phone})"
+                if date < datetime.now().date():
+                    rejected["date column no longer in the sheet"].append(entry)
+                else:
+                    # Kept in the journal so it is retried once the column exists
+                    print(f"Error flushing booking {entry['id']}: date column {entry['date']} not found")
+                continue
             
+            booking_info = f"{entry['customer_name']} ({entry['customer_phone']})"
+            slots_needed = entry["duration"] // TIME_SLOT_INTERVAL
+            cells = {}
             for i in range(slots_needed):
-                slot_time = current_time + timedelta(minutes=i * TIME_SLOT_INTERVAL)
-                slot_time_str = slot_time.strftime("%H:%M")
-                
-                # Find the row for this time slot
-                for row_idx, row in enumerate(all_values[3:], start=4):  # Start from row 4 (index 3)
-                    if len(row) > 0 and row[0] == slot_time_str:
-                        # Update the cell
-                        self.sheet.update_cell(row_idx, date_col + 1, booking_info)
-                        break
+                slot_time = self._add_minutes(entry["time"], i * TIME_SLOT_INTERVAL)
+                row_idx = time_rows.get(slot_time)
+                if row_idx is not None:
+                    cells[(row_idx, date_col + 1)] = slot_time
             
-            return True
+            def current(cell):
+                row = all_values[cell[0] - 1]
+                return row[cell[1] - 1] if len(row) >= cell[1] else ""
             
-        except Exception as e:
-            print(f"Error booking appointment: {e}")
-            raise Exception("Failed to book appointment")
+            # A cell already holding this exact booking is a retry of an earlier flush
+            if any(cell in claimed or current(cell) not in ("", booking_info) for cell in cells):
+                rejected["slot already booked in the sheet"].append(entry)
+                continue
+            
+            for cell, slot_time in cells.items():
+                claimed.add(cell)
+                updates.append({"range": rowcol_to_a1(*cell), "values": [[booking_info]]})
+                written_cells[(date, slot_time)] = booking_info
+            written_ids.append(entry["id"])
+        
+        if updates:
+            self.sheet.batch_update(updates)
+        
+        return written_ids, rejected, written_cells
+    
+    def _apply_to_sheet_cache(self, written_cells: Dict[Tuple, str]):
+        """Copy cells just written to the sheet into the cached values.
+        
+        The cache stays invalidated so the next read refetches, but a stale
+        serve in the meantime still shows the flushed bookings as taken.
+        """
+        cache = self._sheet_cache
+        if not cache or not cache["values"]:
+            return
+        
+        # Copy rather than patch in place: callers may still be reading the old values
+        values = [list(row) for row in cache["values"]]
+        date_columns = self._date_columns(values)
+        time_column = SHEET_CONFIG["time_column"]
+        for row in values[SHEET_CONFIG["first_time_slot_row"]-1:]:
+            if len(row) <= time_column:
+                continue
+            for (day, slot_time), booking_info in written_cells.items():
+                date_col = date_columns.get(day)
+                if date_col is None or row[time_column] != slot_time:
+                    continue
+                if len(row) <= date_col:
+                    row.extend([""] * (date_col + 1 - len(row)))
+                row[date_col] = booking_info
+        
+        fingerprint = hashlib.sha256(json.dumps(values).encode("utf-8")).hexdigest()
+        if fingerprint != cache["fingerprint"]:
+            self.sheet_modified_at = datetime.now()
+        self._sheet_cache = {"values": values, "fetched_at": cache["fetched_at"], "fingerprint": fingerprint, "invalidated": True}
+    
+    async def run_journal_flusher(self, stop: asyncio.Event):
+        """Background loop that drains the journal into Google Sheets, backing off on failures.
+        
+        Returns once ``stop`` is set, after finishing any batch in progress.
+        """
+        interval = JOURNAL_CONFIG["flush_interval_seconds"]
+        delay = interval
+        
+        while not await self._wait_for_stop(stop, delay):
+            try:
+                # Keep going while full batches are being written
+                while await self.flush_journal() >= JOURNAL_CONFIG["batch_size"] and not stop.is_set():
+                    pass
+                delay = interval
+            except Exception as e:
+                delay = min(delay * 2, JOURNAL_CONFIG["max_retry_delay_seconds"])
+                print(f"Error flushing booking journal (retrying in {delay}s): {e}")
+    
+    @staticmethod
+    async def _wait_for_stop(stop: asyncio.Event, timeout: float) -> bool:
+        """Sleep for timeout seconds or until stop is set; returns whether to stop"""
+        try:
+            await asyncio.wait_for(stop.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return stop.is_set()
+    
+    async def maintain_sheet(self) -> Dict:
+        """Archive past date columns and add upcoming ones so the live sheet stays the same size"""
+        if not self.sheet:
+            return {"archived": 0, "added": 0}
+        
+        async with self._write_lock:
+            result = await asyncio.to_thread(
+                rotate_schedule, self.sheet, datetime.now().date(), ARCHIVE_CONFIG["days_ahead"]
+            )
+        if result["archived"] or result["added"]:
+            self._invalidate_sheet_cache()
+            print(f"Sheet maintenance: archived {result['archived']} past day(s), added {result['added']} upcoming day(s)")
+        return result
+    
+    async def run_sheet_maintenance(self, stop: asyncio.Event):
+        """Background loop running maintain_sheet at startup and then periodically, until stop is set"""
+        while not stop.is_set():
+            try:
+                await self.maintain_sheet()
+            except Exception as e:
+                print(f"Error during sheet maintenance: {e!r}")
+            await self._wait_for_stop(stop, ARCHIVE_CONFIG["interval_seconds"])
@@ -0,0 +1,205 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import a1_range_to_grid_range, rowcol_to_a1
+from constants import MAX_BOOKING_DAYS, EMULATOR_CONFIG
+from services.sheet_layout import working_dates, build_schedule_grid
+
+
+class EmulatedAPIError(Exception):
+    """Injected failure, shaped like a Google API error"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+
+
+class EmulatedWorksheet:
+    """In-memory stand-in for the gspread Worksheet methods the scheduler uses.
+
+    Every call pays the configured latency (plus random jitter), may fail with
+    the configured error rate, and counts against a per-minute request quota
+    like the real Sheets API does.
+    """
+
+    def __init__(self, grid: List[List[str]], latency_ms: float = 0, jitter_ms: float = 0,
+                 error_rate: float = 0.0, quota_per_minute: int = 0, seed: Optional[int] = None,
+                 title: str = "Emulated Schedule", spreadsheet: Optional["EmulatedSpreadsheet"] = None):
+        self.title = title
+        self.spreadsheet = spreadsheet or EmulatedSpreadsheet()
+        self.spreadsheet._worksheets.setdefault(title, self)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.quota_per_minute = quota_per_minute
+        self.request_count = 0
+        self.error_count = 0
+        self._grid = [list(row) for row in grid]
+        self._random = random.Random(seed)
+        self._request_times = deque()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "EmulatedWorksheet":
+        """Build an emulator seeded with the upcoming schedule, tuned by EMULATOR_* variables"""
+        dates = working_dates(datetime.now().date(), MAX_BOOKING_DAYS + 1)
+        seed = os.getenv("EMULATOR_SEED")
+        return cls(
+            build_schedule_grid(dates),
+            latency_ms=float(os.getenv("EMULATOR_LATENCY_MS", EMULATOR_CONFIG["latency_ms"])),
+            jitter_ms=float(os.getenv("EMULATOR_JITTER_MS", EMULATOR_CONFIG["jitter_ms"])),
+            error_rate=float(os.getenv("EMULATOR_ERROR_RATE", EMULATOR_CONFIG["error_rate"])),
+            quota_per_minute=int(os.getenv("EMULATOR_QUOTA_PER_MINUTE", EMULATOR_CONFIG["quota_per_minute"])),
+            seed=int(seed) if seed else None
+        )
+
+    def _simulate_request(self):
+        """Apply quota, latency and error injection for one API call"""
+        with self._lock:
+            self.request_count += 1
+            now = time.monotonic()
+            if self.quota_per_minute:
+                while self._request_times and now - self._request_times[0] >= 60:
+                    self._request_times.popleft()
+                if len(self._request_times) >= self.quota_per_minute:
+                    self.error_count += 1
+                    raise EmulatedAPIError(429, "Quota exceeded for read/write requests per minute")
+                self._request_times.append(now)
+            delay = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+            fail = self._random.random() < self.error_rate
+
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if fail:
+            with self._lock:
+                self.error_count += 1
+            raise EmulatedAPIError(503, "The service is currently unavailable")
+
+    def _ensure_size(self, rows: int, cols: int):
+        while len(self._grid) < rows:
+            self._grid.append([])
+        for row in self._grid:
+            if len(row) < cols:
+                row.extend([""] * (cols - len(row)))
+
+    def _write(self, row: int, col: int, values: List[List[str]]):
+        """Write a block of values with its top-left corner at 1-based (row, col)"""
+        width = max((len(line) for line in values), default=0)
+        self._ensure_size(row - 1 + len(values), col - 1 + width)
+        for r, line in enumerate(values):
+            for c, value in enumerate(line):
+                self._grid[row - 1 + r][col - 1 + c] = "" if value is None else str(value)
+
+    @property
+    def row_count(self) -> int:
+        return len(self._grid)
+
+    @property
+    def col_count(self) -> int:
+        return max((len(row) for row in self._grid), default=0)
+
+    def get_all_values(self) -> List[List[str]]:
+        self._simulate_request()
+        with self._lock:
+            width = self.col_count
+            return [row + [""] * (width - len(row)) for row in self._grid]
+
+    def get(self, range_name: str) -> List[List[str]]:
+        """Values in an A1 range, with trailing empty rows and cells dropped like the API does"""
+        self._simulate_request()
+        grid_range = a1_range_to_grid_range(range_name)
+        with self._lock:
+            rows = self._grid[grid_range.get("startRowIndex", 0):grid_range.get("endRowIndex")]
+            values = [row[grid_range.get("startColumnIndex", 0):grid_range.get("endColumnIndex")] for row in rows]
+
+        for row in values:
+            while row and row[-1] == "":
+                row.pop()
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    def update_cell(self, row: int, col: int, value) -> Dict:
+        self._simulate_request()
+        with self._lock:
+            self._write(row, col, [[value]])
+        return {"updatedRange": rowcol_to_a1(row, col), "updatedCells": 1}
+
+    def batch_update(self, data: List[Dict], **kwargs) -> Dict:
+        """Apply several {"range": A1, "values": [[...]]} updates as one request"""
+        self._simulate_request()
+        updated = 0
+        with self._lock:
+            for update in data:
+                grid_range = a1_range_to_grid_range(update["range"])
+                self._write(grid_range.get("startRowIndex", 0) + 1,
+                            grid_range.get("startColumnIndex", 0) + 1,
+                            update["values"])
+                updated += sum(len(line) for line in update["values"])
+        return {"totalUpdatedCells": updated}
+
+    def append_rows(self, values: List[List[str]], **kwargs) -> Dict:
+        """Write rows below the last non-empty row"""
+        self._simulate_request()
+        with self._lock:
+            last = max((row_idx + 1 for row_idx, row in enumerate(self._grid) if any(row)), default=0)
+            self._write(last + 1, 1, values)
+        return {"updates": {"updatedRows": len(values)}}
+
+    def add_rows(self, rows: int):
+        self._simulate_request()
+        with self._lock:
+            self._ensure_size(len(self._grid) + rows, self.col_count)
+
+    def add_cols(self, cols: int):
+        self._simulate_request()
+        with self._lock:
+            self._ensure_size(len(self._grid), self.col_count + cols)
+
+    def delete_columns(self, start_index: int, end_index: Optional[int] = None):
+        """Delete 1-based columns start_index..end_index (inclusive), shifting the rest left"""
+        self._simulate_request()
+        end_index = end_index or start_index
+        with self._lock:
+            for row in self._grid:
+                del row[start_index - 1:end_index]
+
+    def stats(self) -> Dict:
+        return {
+            "requests": self.request_count,
+            "errors": self.error_count,
+            "rows": self.row_count,
+            "cols": self.col_count
+        }
+
+
+class EmulatedSpreadsheet:
+    """In-memory stand-in for the gspread Spreadsheet methods used to reach other worksheets.
+
+    Worksheets added here share the first worksheet's latency and error settings.
+    """
+
+    def __init__(self):
+        self._worksheets: Dict[str, EmulatedWorksheet] = {}
+
+    @property
+    def sheet1(self) -> EmulatedWorksheet:
+        return next(iter(self._worksheets.values()))
+
+    def worksheet(self, title: str) -> EmulatedWorksheet:
+        self.sheet1._simulate_request()
+        if title not in self._worksheets:
+            raise WorksheetNotFound(title)
+        return self._worksheets[title]
+
+    def add_worksheet(self, title: str, rows: int, cols: int, index: Optional[int] = None) -> EmulatedWorksheet:
+        first = self.sheet1
+        first._simulate_request()
+        return EmulatedWorksheet([[""] * cols for _ in range(rows)], latency_ms=first.latency_ms,
+                                 jitter_ms=first.jitter_ms, error_rate=first.error_rate,
+                                 quota_per_minute=first.quota_per_minute, title=title, spreadsheet=self)
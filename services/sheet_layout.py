@@ -0,0 +1,51 @@
+from datetime import date, datetime, timedelta
+from typing import List
+from constants import TIME_SLOT_INTERVAL, WORKING_DAYS, SHOP_INFO, SHEET_CONFIG
+
+
+def working_dates(start_date: date, days: int) -> List[date]:
+    """Working days in [start_date, start_date + days)"""
+    return [start_date + timedelta(days=i) for i in range(days)
+            if (start_date + timedelta(days=i)).weekday() in WORKING_DAYS]
+
+
+def time_slot_labels() -> List[str]:
+    """Every bookable slot start between the shop's opening and closing time"""
+    labels = []
+    current = datetime.strptime(SHOP_INFO["working_hours"]["start"], SHEET_CONFIG["time_format"])
+    end = datetime.strptime(SHOP_INFO["working_hours"]["end"], SHEET_CONFIG["time_format"])
+    while current < end:
+        labels.append(current.strftime(SHEET_CONFIG["time_format"]))
+        current += timedelta(minutes=TIME_SLOT_INTERVAL)
+    return labels
+
+
+def date_column(day: date, slot_count: int) -> List[str]:
+    """Header cells (date, start, end) followed by empty booking cells for one day"""
+    column = [""] * (SHEET_CONFIG["first_time_slot_row"] - 1 + slot_count)
+    column[SHEET_CONFIG["date_row"] - 1] = day.strftime(SHEET_CONFIG["date_format"])
+    column[SHEET_CONFIG["start_time_row"] - 1] = SHOP_INFO["working_hours"]["start"]
+    column[SHEET_CONFIG["end_time_row"] - 1] = SHOP_INFO["working_hours"]["end"]
+    return column
+
+
+def label_column() -> List[str]:
+    """The time column: row labels followed by the slot times"""
+    labels = time_slot_labels()
+    column = [""] * (SHEET_CONFIG["first_time_slot_row"] - 1) + labels
+    column[SHEET_CONFIG["start_time_row"] - 1] = "Start"
+    column[SHEET_CONFIG["end_time_row"] - 1] = "End"
+    return column
+
+
+def build_schedule_grid(dates: List[date]) -> List[List[str]]:
+    """Full worksheet contents (row-major) laid out per SHEET_CONFIG"""
+    labels = label_column()
+    slot_count = len(time_slot_labels())
+    columns = {SHEET_CONFIG["time_column"]: labels}
+    for offset, day in enumerate(dates):
+        columns[SHEET_CONFIG["first_date_column"] + offset] = date_column(day, slot_count)
+
+    width = max(columns) + 1
+    return [[columns[col][row] if col in columns else "" for col in range(width)]
+            for row in range(len(labels))]
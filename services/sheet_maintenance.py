@@ -0,0 +1,242 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import rowcol_to_a1
+from constants import SHEET_CONFIG, TIME_SLOT_INTERVAL, ARCHIVE_CONFIG
+from services.sheet_layout import working_dates, date_column, label_column
+
+ARCHIVE_HEADER = ["Date", "Time", "Booking"]
+
+
+def parse_sheet_date(cell: str, latest: date) -> Optional[date]:
+    """Turn a day/month header into the last such date on or before ``latest``"""
+    # A few years back so 29/02 still finds a leap year
+    for year in range(latest.year, latest.year - 5, -1):
+        try:
+            day = datetime.strptime(f"{cell.strip()}/{year}", SHEET_CONFIG["date_format"] + "/%Y").date()
+        except ValueError:
+            continue
+        if day <= latest:
+            return day
+    return None
+
+
+def column_dates(header: List[str], today: date) -> Dict[int, date]:
+    """Map 0-based column index to date for every parseable date header.
+
+    Headers carry no year, so it comes from the column order: dates run left
+    to right, and the sheet never holds a day more than ``days_ahead`` out.
+    The last column is the latest matching date within that range and every
+    column before it is the latest matching date before its right-hand
+    neighbour, so a header left of a later date is never read as upcoming.
+    """
+    latest = today + timedelta(days=ARCHIVE_CONFIG["days_ahead"])
+    dates = {}
+    for col_idx in range(len(header) - 1, SHEET_CONFIG["first_date_column"] - 1, -1):
+        if not header[col_idx].strip():
+            continue
+        day = parse_sheet_date(header[col_idx], latest)
+        if day:
+            dates[col_idx] = day
+            latest = day - timedelta(days=1)
+    return dates
+
+
+def archive_worksheet(sheet):
+    """The archive worksheet next to the schedule, created on first use"""
+    spreadsheet = sheet.spreadsheet
+    try:
+        return spreadsheet.worksheet(ARCHIVE_CONFIG["worksheet"])
+    except WorksheetNotFound:
+        archive = spreadsheet.add_worksheet(ARCHIVE_CONFIG["worksheet"], rows=1, cols=len(ARCHIVE_HEADER))
+        archive.append_rows([ARCHIVE_HEADER], value_input_option="RAW")
+        return archive
+
+
+def archive_columns(archive, all_values: List[List[str]], columns: Dict[int, date]):
+    """Append the non-empty cells of the given date columns to the archive worksheet (date, row label, value)"""
+    rows = []
+    for col_idx, day in sorted(columns.items(), key=lambda item: item[1]):
+        for row in all_values[1:]:
+            value = row[col_idx] if len(row) > col_idx else ""
+            if value:
+                label = row[SHEET_CONFIG["time_column"]] if len(row) > SHEET_CONFIG["time_column"] else ""
+                rows.append([day.isoformat(), label, value])
+    if rows:
+        archive.append_rows(rows, value_input_option="RAW")
+
+
+def delete_columns(sheet, col_indexes: List[int]):
+    """Delete 0-based columns, one API call per contiguous run, right to left so indexes stay valid"""
+    runs = []
+    for col_idx in sorted(col_indexes):
+        if runs and runs[-1][1] == col_idx - 1:
+            runs[-1][1] = col_idx
+        else:
+            runs.append([col_idx, col_idx])
+    for start, end in reversed(runs):
+        sheet.delete_columns(start + 1, end + 1)
+
+
+def _new_date_column_updates(sheet, header: List[str], days: List[date]) -> List[Dict]:
+    """Batch updates writing header cells for new date columns after the last used one"""
+    if not days:
+        return []
+
+    used = [col_idx for col_idx, cell in enumerate(header) if cell]
+    next_col = max(used + [SHEET_CONFIG["first_date_column"] - 1]) + 1
+    needed = next_col + len(days)
+    if sheet.col_count < needed:
+        sheet.add_cols(needed - sheet.col_count)
+
+    header_rows = SHEET_CONFIG["first_time_slot_row"] - 1
+    updates = []
+    for offset, day in enumerate(sorted(days)):
+        col = next_col + offset + 1
+        updates.append({
+            "range": f"{rowcol_to_a1(1, col)}:{rowcol_to_a1(header_rows, col)}",
+            "values": [[cell] for cell in date_column(day, 0)]
+        })
+    return updates
+
+
+def _days_after(dates: Dict[int, date], days: List[date]) -> List[date]:
+    """The days later than every existing column, so new columns never land out of order"""
+    last = max(dates.values(), default=None)
+    return [day for day in days if last is None or day > last]
+
+
+def rotate_schedule(sheet, today: date, days_ahead: int) -> Dict:
+    """Move past date columns to the archive worksheet and add headers for upcoming days.
+
+    Keeps the live sheet at roughly ``days_ahead`` date columns no matter how
+    long the shop has been running.
+    """
+    all_values = sheet.get_all_values()
+    header = all_values[0] if all_values else []
+    dates = column_dates(header, today)
+
+    past = {col_idx: day for col_idx, day in dates.items() if day < today}
+    if past:
+        # Archive first so a failed delete can never lose bookings
+        archive_columns(archive_worksheet(sheet), all_values, past)
+        delete_columns(sheet, list(past))
+        header = [cell for col_idx, cell in enumerate(header) if col_idx not in past]
+
+    missing = _days_after(dates, working_dates(today, days_ahead))
+
+    updates = _new_date_column_updates(sheet, header, missing)
+    if updates:
+        sheet.batch_update(updates)
+
+    return {"archived": len(past), "added": len(missing)}
+
+
+def provision_schedule(sheet, today: date, weeks: int) -> Dict:
+    """Lay out the time column and date columns for the next weeks in one batch update.
+
+    Safe to re-run: existing date columns and time labels (and any bookings)
+    are left untouched, only what is missing is written. At most
+    ``days_ahead`` days can be provisioned; later headers would be read as
+    last year's (see column_dates).
+    """
+    if weeks * 7 > ARCHIVE_CONFIG["days_ahead"]:
+        raise ValueError(f"Can provision at most {ARCHIVE_CONFIG['days_ahead'] // 7} week(s) ahead")
+
+    all_values = sheet.get_all_values()
+    header = all_values[0] if all_values else []
+    time_column = SHEET_CONFIG["time_column"]
+    updates = []
+
+    labels = label_column()
+    has_labels = any(len(row) > time_column and row[time_column] for row in all_values)
+    if not has_labels:
+        if sheet.row_count < len(labels):
+            sheet.add_rows(len(labels) - sheet.row_count)
+        updates.append({
+            "range": f"{rowcol_to_a1(1, time_column + 1)}:{rowcol_to_a1(len(labels), time_column + 1)}",
+            "values": [[label] for label in labels]
+        })
+
+    missing = _days_after(column_dates(header, today), working_dates(today, weeks * 7))
+    updates.extend(_new_date_column_updates(sheet, header, missing))
+
+    if updates:
+        sheet.batch_update(updates)
+
+    return {"time_rows": 0 if has_labels else len(labels) - SHEET_CONFIG["first_time_slot_row"] + 1,
+            "added": len(missing)}
+
+
+def _column_letter(col_idx: int) -> str:
+    """Spreadsheet letter for a 0-based column index"""
+    return rowcol_to_a1(1, col_idx + 1)[:-1]
+
+
+def validate_layout(all_values: List[List[str]], today: date) -> List[str]:
+    """Check worksheet contents against SHEET_CONFIG, returning a list of problems"""
+    if not all_values:
+        return ["Sheet is empty"]
+
+    problems = []
+    time_column = SHEET_CONFIG["time_column"]
+
+    def cell(row: int, col: int) -> str:
+        """1-based row, 0-based column, like SHEET_CONFIG"""
+        values = all_values[row - 1] if len(all_values) >= row else []
+        return values[col].strip() if len(values) > col else ""
+
+    def parse_time(value: str) -> Optional[datetime]:
+        try:
+            return datetime.strptime(value, SHEET_CONFIG["time_format"])
+        except ValueError:
+            return None
+
+    # Time column: consecutive slots TIME_SLOT_INTERVAL apart
+    slot_times = []
+    for row in range(SHEET_CONFIG["first_time_slot_row"], len(all_values) + 1):
+        label = cell(row, time_column)
+        if not label:
+            continue
+        parsed = parse_time(label)
+        if parsed is None:
+            problems.append(f"Row {row}: time slot '{label}' is not in {SHEET_CONFIG['time_format']} format")
+            continue
+        if slot_times and parsed - slot_times[-1] != timedelta(minutes=TIME_SLOT_INTERVAL):
+            problems.append(f"Row {row}: {label} does not follow {slot_times[-1].strftime('%H:%M')} "
+                            f"by {TIME_SLOT_INTERVAL} minutes")
+        slot_times.append(parsed)
+    if not slot_times:
+        problems.append(f"No time slots found from row {SHEET_CONFIG['first_time_slot_row']} "
+                        f"in column {_column_letter(time_column)}")
+
+    # Date columns: parseable, unique, with working hours covered by the time slots
+    seen = {}
+    header = all_values[SHEET_CONFIG["date_row"] - 1]
+    for col_idx in range(SHEET_CONFIG["first_date_column"], len(header)):
+        label = header[col_idx].strip()
+        if not label:
+            continue
+        column = _column_letter(col_idx)
+        if parse_sheet_date(label, today + timedelta(days=366)) is None:
+            problems.append(f"Column {column}: '{label}' is not a date in {SHEET_CONFIG['date_format']} format")
+            continue
+        if label in seen:
+            problems.append(f"Column {column}: date {label} already used in column {seen[label]}")
+        seen[label] = column
+
+        start = parse_time(cell(SHEET_CONFIG["start_time_row"], col_idx))
+        end = parse_time(cell(SHEET_CONFIG["end_time_row"], col_idx))
+        if start is None or end is None:
+            problems.append(f"Column {column} ({label}): start/end time missing or invalid")
+            continue
+        if start >= end:
+            problems.append(f"Column {column} ({label}): start time is not before end time")
+        elif slot_times and (start < slot_times[0] or end - timedelta(minutes=TIME_SLOT_INTERVAL) > slot_times[-1]):
+            problems.append(f"Column {column} ({label}): working hours {start.strftime('%H:%M')}-"
+                            f"{end.strftime('%H:%M')} extend past the time slot rows")
+
+    if not seen:
+        problems.append(f"No date columns found in row {SHEET_CONFIG['date_row']}")
+
+    return problems
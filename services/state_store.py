@@ -0,0 +1,29 @@
+import json
+import os
+from typing import Any
+
+
+def write_json_atomic(path: str, data: Any):
+    """Write JSON so a crash mid-write never leaves a half-written file behind"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_json(path: str, default: Any = None) -> Any:
+    """Read a JSON file written by write_json_atomic, or return default if missing or unreadable"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Error reading {path}: {e}")
+        return default
@@ -0,0 +1,41 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """Small in-memory cache with a size bound and per-entry expiry.
+
+    Entries all live for the same ``ttl_seconds``, so insertion order is also
+    expiry order and pruning only ever looks at the oldest entries.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def _prune(self):
+        now = time.monotonic()
+        while self._entries:
+            key, (_, expires_at) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        self._prune()
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def set(self, key: Hashable, value: Any):
+        self._entries.pop(key, None)
+        self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+        self._prune()
+
+    def pop(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        self._prune()
+        return len(self._entries)
@@ -3,16 +3,26 @@
 Google Sheets Setup Helper for Barbershop Website
 
 This script helps you create and configure the Google Sheet for appointment scheduling.
+
+Usage:
+    python setup_google_sheet.py                      # Print setup instructions
+    python setup_google_sheet.py --provision --weeks 2  # Build the schedule layout in the sheet
+    python setup_google_sheet.py --validate           # Check an existing sheet's layout
 """
 
 import os
+import sys
 import json
-from datetime import datetime, timedelta
+import argparse
+from datetime import datetime
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+from constants import SHOP_INFO, SHEET_CONFIG, MAX_BOOKING_DAYS, ARCHIVE_CONFIG
+from services.sheet_layout import working_dates, time_slot_labels
+
 def create_sheet_structure():
     """Create the basic structure for the scheduling sheet"""
     print("📊 Google Sheets Setup Instructions")
@@ -41,11 +51,9 @@ def create_sheet_structure():
     print("Set up your sheet with this structure:")
     
     # Generate dates for the next week
-    today = datetime.now()
-    dates = []
-    for i in range(7):
-        date = today + timedelta(days=i)
-        dates.append(date.strftime("%d/%m"))
+    dates = [date.strftime(SHEET_CONFIG["date_format"]) for date in working_dates(datetime.now().date(), MAX_BOOKING_DAYS)]
+    start = SHOP_INFO["working_hours"]["start"]
+    end = SHOP_INFO["working_hours"]["end"]
     
     print("\nRow 1 (Dates):")
     print("A1: (empty)  ", end="")
@@ -55,19 +63,21 @@ def create_sheet_structure():
     
     print("\nRow 2 (Start Times):")
     print("A2: Start    ", end="")
-    for i in range(7):
-        print(f"  {chr(66+i)}2: 09:30", end="")
+    for i in range(len(dates)):
+        print(f"  {chr(66+i)}2: {start}", end="")
     print()
     
     print("\nRow 3 (End Times):")
     print("A3: End      ", end="")
-    for i in range(7):
-        print(f"  {chr(66+i)}3: 17:45", end="")
+    for i in range(len(dates)):
+        print(f"  {chr(66+i)}3: {end}", end="")
     print()
     
+    labels = time_slot_labels()
     print("\nRows 4+ (Time Slots):")
-    print("A4: 09:30, A5: 09:45, A6: 10:00, etc. (every 15 minutes)")
+    print(f"A4: {labels[0]}, A5: {labels[1]}, A6: {labels[2]}, etc. (every 15 minutes until {labels[-1]})")
     print("Leave other columns empty for bookings")
+    print("Or let this script do it: python setup_google_sheet.py --provision --weeks 2")
     
     print(f"\n🔐 Share Settings:")
     print(f"4. Click 'Share' button")
@@ -83,7 +93,7 @@ def create_sheet_structure():
     print("   GOOGLE_SHEET_ID=your_actual_sheet_id")
     
     print(f"\n✅ Test Connection:")
-    print("10. Run: python -c \"from services.scheduler import SchedulerService; SchedulerService()\"")
+    print("10. Run: python -c \"from services.scheduler import open_worksheet; open_worksheet()\"")
     
     print(f"\n📧 Email Setup:")
     print("For email functionality, you need to set up Gmail:")
@@ -91,5 +101,57 @@ def create_sheet_structure():
     print("- Generate an App Password (Google Account > Security > App passwords)")
     print("- Update .env with your email and app password")
 
+def open_schedule_sheet():
+    """Connect to the schedule worksheet configured in .env"""
+    # Not SchedulerService: that replays and compacts the booking journal, which races a running server
+    from services.scheduler import open_worksheet
+    
+    sheet = open_worksheet()
+    if not sheet:
+        print("❌ Could not open the Google Sheet; check GOOGLE_SHEETS_CREDENTIALS_JSON and GOOGLE_SHEET_ID")
+        sys.exit(1)
+    return sheet
+
+def provision_sheet(weeks: int):
+    """Write the header rows, time slots and N weeks of dates in one batched update"""
+    from services.sheet_maintenance import provision_schedule
+    
+    sheet = open_schedule_sheet()
+    result = provision_schedule(sheet, datetime.now().date(), weeks)
+    if not result["time_rows"] and not result["added"]:
+        print(f"✅ Sheet already has the time slots and {weeks} week(s) of dates, nothing to do")
+        return
+    print(f"✅ Added {result['time_rows']} time slot row(s) and {result['added']} date column(s)")
+
+def validate_sheet():
+    """Check an existing sheet against SHEET_CONFIG with a single read"""
+    from services.sheet_maintenance import validate_layout
+    
+    sheet = open_schedule_sheet()
+    problems = validate_layout(sheet.get_all_values(), datetime.now().date())
+    if not problems:
+        print("✅ Sheet layout matches SHEET_CONFIG")
+        return
+    print(f"❌ Found {len(problems)} problem(s):")
+    for problem in problems:
+        print(f"   - {problem}")
+    sys.exit(1)
+
 if __name__ == "__main__":
-    create_sheet_structure()
+    parser = argparse.ArgumentParser(description="Google Sheets setup helper for the barbershop schedule")
+    parser.add_argument("--provision", action="store_true", help="create the schedule layout in the sheet")
+    max_weeks = ARCHIVE_CONFIG["days_ahead"] // 7
+    parser.add_argument("--weeks", type=int, default=max_weeks,
+                        help=f"weeks of date columns to provision (default and maximum: {max_weeks})")
+    parser.add_argument("--validate", action="store_true", help="check the sheet layout against SHEET_CONFIG")
+    args = parser.parse_args()
+    if not 1 <= args.weeks <= max_weeks:
+        # Dates further ahead would be read as last year's; the server adds later days itself
+        parser.error(f"--weeks must be between 1 and {max_weeks}")
+    
+    if args.provision:
+        provision_sheet(args.weeks)
+    if args.validate:
+        validate_sheet()
+    if not args.provision and not args.validate:
+        create_sheet_structure()
@@ -66,6 +66,26 @@ function initBookingForm() {
     let selectedServices = [];
     let availableSlots = [];
     
+    // Slot lookups: debounced, cached for a short time and shared while in flight
+    const bookingConfig = window.bookingConfig || {};
+    const workingDays = bookingConfig.workingDays || [0, 1, 2, 3, 4, 5, 6]; // JS getDay(): 0 = Sunday
+    const SLOT_CACHE_TTL = 30 * 1000;
+    const SLOT_DEBOUNCE_MS = 250;
+    const slotCache = new Map(); // "date|services" -> { promise, fetchedAt }
+    let slotLoadTimer = null;
+    
+    // Availability embedded in the page by the server, so the first lookups need no round-trip.
+    // It comes from the server's sheet cache, so it expires relative to when that was fetched.
+    const initialSlotsFetchedAt = Date.now() - (bookingConfig.initialSlotsAgeSeconds || 0) * 1000;
+    Object.entries(bookingConfig.initialSlots || {}).forEach(([key, slots]) => {
+        slotCache.set(key, { promise: Promise.resolve(slots), fetchedAt: initialSlotsFetchedAt });
+    });
+    
+    // One key per booking attempt; resubmitting the same form reuses it so the server can dedupe
+    let idempotencyKey = null;
+    bookingForm.addEventListener('input', () => { idempotencyKey = null; });
+    bookingForm.addEventListener('change', () => { idempotencyKey = null; });
+    
     // Service selection
     serviceCheckboxes.forEach(checkbox => {
         checkbox.addEventListener('change', function() {
@@ -84,11 +104,7 @@ function initBookingForm() {
         dateInput.max = maxDate.toISOString().split('T')[0];
         
         dateInput.addEventListener('change', function() {
-            if (this.value && selectedServices.length > 0) {
-                loadAvailableSlots(this.value, selectedServices);
-            } else {
-                clearTimeSlots();
-            }
+            updateTimeSlotsIfDateSelected();
         });
     }
     
@@ -120,32 +136,103 @@ function initBookingForm() {
     }
     
     function updateTimeSlotsIfDateSelected() {
+        clearTimeout(slotLoadTimer);
+        
         if (dateInput && dateInput.value && selectedServices.length > 0) {
-            loadAvailableSlots(dateInput.value, selectedServices);
+            // Wait for the user to stop clicking before asking the server
+            const date = dateInput.value;
+            const services = selectedServices.slice();
+            slotLoadTimer = setTimeout(() => loadAvailableSlots(date, services), SLOT_DEBOUNCE_MS);
         } else {
             clearTimeSlots();
         }
     }
     
+    function slotCacheKey(date, services) {
+        return date + '|' + services.slice().sort().join(',');
+    }
+    
+    function fetchSlots(date, services) {
+        const key = slotCacheKey(date, services);
+        const cached = slotCache.get(key);
+        if (cached && Date.now() - cached.fetchedAt < SLOT_CACHE_TTL) {
+            return cached.promise;
+        }
+        
+        const promise = fetch(`/api/available-slots?date=${date}&services=${services.slice().sort().join(',')}`)
+            .then(async response => {
+                const data = await response.json();
+                if (!response.ok) {
+                    const error = new Error(data.detail);
+                    error.fromServer = true;
+                    throw error;
+                }
+                return data.slots;
+            });
+        
+        slotCache.set(key, { promise, fetchedAt: Date.now() });
+        // Don't keep failures around
+        promise.catch(() => slotCache.delete(key));
+        return promise;
+    }
+    
+    function isCurrentSelection(date, services) {
+        return dateInput && dateInput.value === date &&
+            slotCacheKey(date, services) === slotCacheKey(date, selectedServices);
+    }
+    
+    function adjacentWorkingDays(date) {
+        // Nearest working day before and after, within the bookable range
+        const days = [];
+        [-1, 1].forEach(step => {
+            const day = new Date(date + 'T00:00:00Z');
+            for (let i = 0; i < 7; i++) {
+                day.setUTCDate(day.getUTCDate() + step);
+                const value = day.toISOString().split('T')[0];
+                if ((dateInput.min && value < dateInput.min) || (dateInput.max && value > dateInput.max)) {
+                    break;
+                }
+                if (workingDays.includes(day.getUTCDay())) {
+                    days.push(value);
+                    break;
+                }
+            }
+        });
+        return days;
+    }
+    
+    function prefetchAdjacentDays(date, services) {
+        adjacentWorkingDays(date).forEach(day => {
+            fetchSlots(day, services).catch(() => {});
+        });
+    }
+    
     async function loadAvailableSlots(date, services) {
         if (!timeSlotsContainer) return;
         
-        // Show loading
-        showLoading(timeSlotsContainer);
+        const cached = slotCache.get(slotCacheKey(date, services));
+        if (!cached || Date.now() - cached.fetchedAt >= SLOT_CACHE_TTL) {
+            // Show loading
+            showLoading(timeSlotsContainer);
+        }
         
         try {
-            const response = await fetch(`/api/available-slots?date=${date}&services=${services.join(',')}`);
-            const data = await response.json();
+            const slots = await fetchSlots(date, services);
             
-            if (response.ok) {
-                displayTimeSlots(data.slots);
-            } else {
-                showError('Failed to load available slots: ' + data.detail);
-                clearTimeSlots();
-            }
+            // The user may have changed the date or services while we were waiting
+            if (!isCurrentSelection(date, services)) return;
+            
+            displayTimeSlots(slots);
+            prefetchAdjacentDays(date, services);
         } catch (error) {
+            if (!isCurrentSelection(date, services)) return;
+            
             console.error('Error loading slots:', error);
-            showError('Failed to load available slots. Please try again.');
+            if (error.fromServer) {
+                showError('Failed to load available slots: ' + error.message);
+            } else {
+                showError('Failed to load available slots. Please try again.');
+            }
             clearTimeSlots();
         }
     }
@@ -187,6 +274,7 @@ function initBookingForm() {
         if (selectedTimeInput) {
             selectedTimeInput.value = time;
         }
+        idempotencyKey = null;
     }
     
     function clearTimeSlots() {
@@ -254,8 +342,13 @@ function initBookingForm() {
             submitBtn.disabled = true;
             submitBtn.textContent = 'Booking...';
             
+            if (!idempotencyKey) {
+                idempotencyKey = newIdempotencyKey();
+            }
+            
             const response = await fetch('/api/book-appointment', {
                 method: 'POST',
+                headers: { 'Idempotency-Key': idempotencyKey },
                 body: formData
             });
             
@@ -423,6 +516,13 @@ function showSuccess(message) {
     }
 }
 
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return Date.now().toString(36) + Math.random().toString(36).slice(2);
+}
+
 function isValidEmail(email) {
     const emailRegex = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
     return emailRegex.test(email);